@@ -1,7 +1,9 @@
+import functools
 import json
 import logging
 from datetime import datetime
 from peewee import PostgresqlDatabase, SqliteDatabase, DoesNotExist
+from pybtex.database import Entry
 from pybtex.database.input import bibtex
 from typing import List, Union
 
@@ -13,9 +15,17 @@ from brainscore_core.submission.utils import get_secret
 
 logger = logging.getLogger(__name__)
 
+# sqlite is only used for local and test databases: trade durability for speed by not syncing journals to disk
+_SQLITE_PRAGMAS = {'journal_mode': 'memory', 'synchronous': 'off', 'cache_size': -64000}
+
 
 def connect_db(db_secret):
-    if 'sqlite3' not in db_secret:
+    """
+    Connect to the Postgres database whose credentials are stored under `db_secret` in the AWS secrets manager.
+    A `db_secret` containing `sqlite3` (a local database file) or `:memory:` (an in-process database)
+    instead connects to sqlite and creates the tables.
+    """
+    if 'sqlite3' not in db_secret and db_secret != ':memory:':
         secret = get_secret(db_secret)
         db_configs = json.loads(secret)
         postgres = PostgresqlDatabase(db_configs['dbInstanceIdentifier'],
@@ -24,7 +34,7 @@ def connect_db(db_secret):
         database_proxy.initialize(postgres)
         database_proxy.connect()
     else:
-        sqlite = SqliteDatabase(db_secret)
+        sqlite = SqliteDatabase(db_secret, pragmas=_SQLITE_PRAGMAS)
         database_proxy.initialize(sqlite)
         all_orm_models = PeeweeBase.__subclasses__()
         for orm_model in all_orm_models:
@@ -66,29 +76,28 @@ def submissionentry_from_meta(jenkins_id: int, user_id: int, model_type: str) ->
 
 
 def public_model_identifiers(domain: str) -> List[str]:
-    entries = Model.select().where(Model.public & (Model.domain == domain))
-    identifiers = [entry.name for entry in entries]
+    entries = Model.select(Model.name).where(Model.public & (Model.domain == domain)).tuples()
+    identifiers = [name for (name,) in entries]
     return identifiers
 
 
 def public_benchmark_identifiers(domain: str) -> List[str]:
     entries = BenchmarkInstance.select(BenchmarkType.identifier).join(BenchmarkType).where(
         (BenchmarkType.domain == domain) & (BenchmarkType.visible)
-    )
-    identifiers = [entry.benchmark.identifier for entry in entries]
+    ).tuples()
+    identifiers = [identifier for (identifier,) in entries]
     return identifiers
 
 
 def modelentry_from_model(model_identifier: str, public: bool, competition: Union[None, str],
                           submission: Submission, domain: str,
                           bibtex: Union[None, str] = None) -> Model:
-    model_entry, created = Model.get_or_create(name=model_identifier,
-                                               defaults={
-                                                   'owner': submission.submitter,
-                                                   'domain': domain,
-                                                   'public': public,
-                                                   'submission': submission,
-                                                   'competition': competition})
+    # model names are not unique in the database; deterministically resolve duplicates to the oldest entry
+    model_entry = Model.select().where(Model.name == model_identifier).order_by(Model.id).first()
+    created = model_entry is None
+    if created:
+        model_entry = Model.create(name=model_identifier, owner=submission.submitter, domain=domain, public=public,
+                                   submission=submission, competition=competition)
     if bibtex and created:  # model entry was just created and we can add bibtex
         reference = reference_from_bibtex(bibtex)
         model_entry.reference = reference
@@ -117,38 +126,53 @@ def benchmarkinstance_from_benchmark(benchmark: Benchmark, domain: str) -> Bench
                 benchmark_type.reference = ref
                 benchmark_type.save()
 
-    # process instance
-    bench_inst, created = BenchmarkInstance.get_or_create(benchmark=benchmark_type, version=benchmark.version)
-    if created:
+    # process instance, fetching its benchmark type in the same query
+    bench_inst = BenchmarkInstance.select(BenchmarkInstance, BenchmarkType).join(BenchmarkType).where(
+        (BenchmarkInstance.benchmark == benchmark_type) & (BenchmarkInstance.version == benchmark.version)
+    ).first()
+    if bench_inst is None:
         # the version has changed and the benchmark instance was not yet in the database
         ceiling = benchmark.ceiling
-        bench_inst.ceiling = ceiling.item()
-        bench_inst.ceiling_error = _retrieve_score_error(ceiling)
-        bench_inst.save()
+        bench_inst = BenchmarkInstance.create(benchmark=benchmark_type, version=benchmark.version,
+                                              ceiling=ceiling.item(), ceiling_error=_retrieve_score_error(ceiling))
     return bench_inst
 
 
 def reference_from_bibtex(bibtex_string: str) -> Union[Reference, None]:
-    def parse_bib(bibtex_str):
-        bib_parser = bibtex.Parser()
-        entry = bib_parser.parse_string(bibtex_str)
-        entry = entry.entries
-        assert len(entry) == 1
-        entry = list(entry.values())[0]
-        return entry
-
     try:
-        entry = parse_bib(bibtex_string)
-        ref, created = Reference.get_or_create(url=entry.fields['url'],
-                                               defaults={'bibtex': bibtex_string,
-                                                         'author': entry.persons["author"][0].last()[0],
-                                                         'year': entry.fields['year']})
-        return ref
+        entry = _parse_bibtex(bibtex_string)
+        return _upsert_reference(entry, bibtex_string)
     except Exception:
         logger.exception('Could not load reference from bibtex string')
         return None
 
 
+def _upsert_reference(entry: Entry, bibtex_string: str) -> Reference:
+    """
+    Retrieve the reference for a parsed bibtex entry, creating it if needed.
+    Unlike the parsing, this is not cached since the database rows can change (e.g. be deleted) between calls.
+    """
+    ref, created = Reference.get_or_create(url=entry.fields['url'],
+                                           defaults={'bibtex': bibtex_string,
+                                                     'author': entry.persons["author"][0].last()[0],
+                                                     'year': entry.fields['year']})
+    return ref
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_bibtex(bibtex_string: str) -> Entry:
+    """
+    Parse a bibtex string containing exactly one entry.
+    Parsing is deterministic, so results are cached by the raw string; the returned entry must not be modified.
+    """
+    bib_parser = bibtex.Parser()
+    entry = bib_parser.parse_string(bibtex_string)
+    entry = entry.entries
+    assert len(entry) == 1
+    entry = list(entry.values())[0]
+    return entry
+
+
 def update_score(score: ScoreObject, entry: Score):
     if 'ceiling' not in score.attrs:  # many engineering benchmarks do not have a primate ceiling
         # only store raw (unceiled) value
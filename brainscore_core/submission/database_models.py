@@ -114,14 +114,11 @@ def clear_schema():
     """
     Delete the contents of all tables.
     This function is meant for testing only, use with caution.
+    The per-table deletes are batched into one transaction.
     """
-    Score.delete().execute()
-    Model.delete().execute()
-    Submission.delete().execute()
-    BenchmarkInstance.delete().execute()
-    BenchmarkType.delete().execute()
-    Reference.delete().execute()
-    User.delete().execute()
+    with database_proxy.atomic():
+        for table in [Score, Model, Submission, BenchmarkInstance, BenchmarkType, Reference, User]:
+            table.delete().execute()
 
 
 def create_schema(schema_name):
@@ -124,22 +124,48 @@ class RunScoringEndpoint:
         :param model_identifier: a string of a model identifier
         :param benchmark_identifier: a string of a model identifier
         """
+        self.score_many(domain=domain, jenkins_id=jenkins_id,
+                        model_identifiers=[model_identifier], benchmark_identifiers=[benchmark_identifier],
+                        user_id=user_id, model_type=model_type, public=public, competition=competition)
+
+    def score_many(self, domain: str, jenkins_id: int, model_identifiers: List[str], benchmark_identifiers: List[str],
+                   user_id: int, model_type: str, public: bool, competition: Union[None, str]):
+        """
+        Run every model in `model_identifiers` on every benchmark in `benchmark_identifiers` as a single submission,
+        and write the resulting scores to the database.
+        Database entries for each model and benchmark are set up once, rather than once per model/benchmark pair.
+        Each score is still written as soon as it is computed, so that finished scores are kept if a later pair fails.
+
+        Explanation of subset of parameters:
+        :param domain: "language" or "vision"
+        :param model_identifiers: a list of model identifiers
+        :param benchmark_identifiers: a list of benchmark identifiers
+        """
         # setup entry for this submission
         submission_entry = submissionentry_from_meta(jenkins_id=jenkins_id, user_id=user_id, model_type=model_type)
         is_run_successful = True
 
-        logger.debug(f"Scoring {model_identifier} on {benchmark_identifier}")
-
-        try:
-            self._score_model_on_benchmark(model_identifier=model_identifier,
-                                           benchmark_identifier=benchmark_identifier,
-                                           submission_entry=submission_entry, domain=domain,
-                                           public=public, competition=competition)
-        except Exception as e:
-            is_run_successful = False
-            logging.error(
-                f'Could not run model {model_identifier} on benchmark {benchmark_identifier} because of {e}',
-                exc_info=True)
+        model_entries, benchmark_entries = {}, {}
+        for model_identifier in model_identifiers:
+            for benchmark_identifier in benchmark_identifiers:
+                logger.debug(f"Scoring {model_identifier} on {benchmark_identifier}")
+                try:
+                    if model_identifier not in model_entries:
+                        model_entries[model_identifier] = self._model_entry(
+                            model_identifier=model_identifier, submission_entry=submission_entry, domain=domain,
+                            public=public, competition=competition)
+                    if benchmark_identifier not in benchmark_entries:
+                        benchmark_entries[benchmark_identifier] = self._benchmark_entry(
+                            benchmark_identifier=benchmark_identifier, domain=domain)
+                    self._score_model_on_benchmark(model_identifier=model_identifier,
+                                                   benchmark_identifier=benchmark_identifier,
+                                                   model_entry=model_entries[model_identifier],
+                                                   benchmark_entry=benchmark_entries[benchmark_identifier])
+                except Exception as e:
+                    is_run_successful = False
+                    logging.error(
+                        f'Could not run model {model_identifier} on benchmark {benchmark_identifier} because of {e}',
+                        exc_info=True)
 
         # finalize status of submission
         submission_status = 'successful' if is_run_successful else 'failure'
@@ -148,21 +174,24 @@ class RunScoringEndpoint:
         logger.info(f'Submission is stored as {submission_status}')
         submission_entry.save()
 
-    def _score_model_on_benchmark(self, model_identifier: str, benchmark_identifier: str,
-                                  submission_entry: database_models.Submission, domain: str,
-                                  public: bool, competition: Union[None, str]):
+    def _model_entry(self, model_identifier: str, submission_entry: database_models.Submission, domain: str,
+                     public: bool, competition: Union[None, str]) -> database_models.Model:
         # TODO: the following is somewhat ugly because we're afterwards loading model and benchmark again
         #  in the `score` method.
         logger.info(f'Model database entry')
         model = self.domain_plugins.load_model(model_identifier)
-        model_entry = modelentry_from_model(model_identifier=model_identifier, domain=domain,
-                                            submission=submission_entry, public=public, competition=competition,
-                                            bibtex=model.bibtex if hasattr(model, 'bibtex') else None)
+        return modelentry_from_model(model_identifier=model_identifier, domain=domain,
+                                     submission=submission_entry, public=public, competition=competition,
+                                     bibtex=model.bibtex if hasattr(model, 'bibtex') else None)
 
+    def _benchmark_entry(self, benchmark_identifier: str, domain: str) -> database_models.BenchmarkInstance:
         logger.info(f'Benchmark database entry')
         benchmark = self.domain_plugins.load_benchmark(benchmark_identifier)
-        benchmark_entry = benchmarkinstance_from_benchmark(benchmark, domain=domain)
+        return benchmarkinstance_from_benchmark(benchmark, domain=domain)
 
+    def _score_model_on_benchmark(self, model_identifier: str, benchmark_identifier: str,
+                                  model_entry: database_models.Model,
+                                  benchmark_entry: database_models.BenchmarkInstance):
         # Check if the model is already scored on the benchmark
         start_timestamp = datetime.now()
         score_entry, created = database_models.Score.get_or_create(benchmark=benchmark_entry, model=model_entry,
@@ -22,12 +22,10 @@ def find_submission_directory(work_dir):
     Find the single directory inside a directory that corresponds to the submission file.
     Ignores hidden directories, e.g. those prefixed with `.` and `_`
     """
-    path_list = os.listdir(work_dir)
-    candidates = []
-    for item in path_list:
-        if not item.startswith('.') and not item.startswith('_'):
-            candidates.append(item)
-    if len(candidates) is 1:
+    with os.scandir(work_dir) as entries:
+        candidates = [entry.name for entry in entries
+                      if not entry.name.startswith('.') and not entry.name.startswith('_')]
+    if len(candidates) == 1:
         return candidates[0]
     logger.error('The zip file structure is not correct, we try to detect the correct directory')
     if 'sample-model-submission' in candidates:
@@ -2,9 +2,14 @@ from datetime import datetime
 
 from brainscore_core.submission.database_models import User
 
+POSTGRESQL_TEST_DATABASE = 'brainscore-ohio-test'
+SQLITE_TEST_DATABASE = ':memory:'
+
+_FIXED_TS = datetime(2022, 1, 1)  # deterministic timestamp for seeded rows
+
 
 def init_users():
     User.create(id=1, email='test@brainscore.com', is_active=True, is_staff=False, is_superuser=False,
-                last_login=datetime.now(), password='abcde')
+                last_login=_FIXED_TS, password='abcde')
     User.create(id=2, email='admin@brainscore.com', is_active=True, is_staff=True, is_superuser=True,
-                last_login=datetime.now(), password='abcdef')
+                last_login=_FIXED_TS, password='abcdef')
@@ -0,0 +1,117 @@
+import os
+import socket
+
+import pytest
+import requests_mock
+
+from brainscore_core.submission.database import connect_db
+from brainscore_core.submission.database_models import database_proxy, clear_schema
+from tests.test_submission import POSTGRESQL_TEST_DATABASE, SQLITE_TEST_DATABASE, init_users
+
+
+def _use_postgres() -> bool:
+    return os.environ.get('BRAINSCORE_TEST_DB') == 'postgres'
+
+
+def pytest_collection_modifyitems(items):
+    if _use_postgres():
+        return
+    skip_integration = pytest.mark.skip(reason="requires the Postgres test database (BRAINSCORE_TEST_DB=postgres)")
+    for item in items:
+        if 'integration' in item.keywords:
+            item.add_marker(skip_integration)
+
+
+@pytest.fixture(scope='session')
+def db_secret():
+    """
+    The test database: an in-process sqlite database by default,
+    or the Postgres test database when running with `BRAINSCORE_TEST_DB=postgres`.
+    """
+    if not _use_postgres():
+        return SQLITE_TEST_DATABASE  # private to each process, and thereby to each pytest-xdist worker
+    if 'PYTEST_XDIST_WORKER' in os.environ:
+        pytest.exit("The Postgres test database is shared and cleared at the start of every session, "
+                    "run it without pytest-xdist (no `-n`)", returncode=pytest.ExitCode.USAGE_ERROR)
+    return POSTGRESQL_TEST_DATABASE
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _db(db_secret):
+    """ connect, clear the schema and seed the users once per session """
+    connect_db(db_secret=db_secret)
+    clear_schema()
+    init_users()
+    yield
+    database_proxy.close()
+
+
+@pytest.fixture(scope='class')
+def _class_txn(_db):
+    """ transaction spanning all tests of a class, for rows that the tests of that class share """
+    with database_proxy.atomic() as txn:
+        yield
+        txn.rollback()
+
+
+@pytest.fixture(autouse=True)
+def _txn(_db):
+    """ run each test inside a transaction that is rolled back afterwards, instead of clearing all tables """
+    with database_proxy.atomic() as txn:
+        yield
+        txn.rollback()
+
+
+@pytest.fixture(autouse=True)
+def _reuse_db_connection(monkeypatch):
+    """
+    Endpoints connect to the database when they are constructed.
+    Keep them on the session connection so that they see, and are part of, the test transaction.
+    """
+    monkeypatch.setattr('brainscore_core.submission.endpoints.connect_db', lambda db_secret: None)
+
+
+@pytest.fixture(autouse=True)
+def _block_network(monkeypatch):
+    """
+    Fail right away instead of waiting for a timeout when a test tries to reach the network.
+    Local (unix) sockets stay available, and runs against the Postgres test database are not restricted.
+    """
+    if _use_postgres():
+        return
+    connect = socket.socket.connect
+
+    def local_connect(sock, address):
+        if sock.family == socket.AF_UNIX:
+            return connect(sock, address)
+        raise RuntimeError(f"Tests must not access the network, but tried to connect to {address}")
+
+    monkeypatch.setattr(socket.socket, 'connect', local_connect)
+
+
+@pytest.fixture(scope='package')
+def _package_requests_mock():
+    with requests_mock.Mocker() as mocker:
+        yield mocker
+
+
+@pytest.fixture
+def package_requests_mock(_package_requests_mock):
+    """
+    HTTP mock that is installed once for this test package.
+    Tests register their expected requests on it; the call history is reset for every test.
+    """
+    _package_requests_mock.reset_mock()
+    return _package_requests_mock
+
+
+@pytest.fixture(scope='package')
+def _package_smtp_mock(package_mocker):
+    return package_mocker.patch('brainscore_core.submission.endpoints.smtplib.SMTP_SSL')
+
+
+@pytest.fixture
+def smtp_mock(_package_smtp_mock):
+    """ `smtplib.SMTP_SSL` mock that is patched once for this test package, with its calls reset for every test """
+    _package_smtp_mock.reset_mock()
+    return _package_smtp_mock
@@ -1,52 +1,36 @@
 import logging
 
 import numpy as np
+import pytest
+from playhouse.test_utils import count_queries
 
 from brainscore_core import Score as ScoreObject
 from brainscore_core.benchmarks import BenchmarkBase
-from brainscore_core.submission.database import (connect_db, reference_from_bibtex, benchmarkinstance_from_benchmark,
+from brainscore_core.submission.database import (reference_from_bibtex, benchmarkinstance_from_benchmark,
                                                  submissionentry_from_meta, modelentry_from_model, update_score,
                                                  public_model_identifiers, public_benchmark_identifiers,
                                                  email_from_uid, uid_from_email)
-from brainscore_core.submission.database_models import Score, BenchmarkType, BenchmarkInstance, Reference, clear_schema
-from tests.test_submission import init_users
-
-logger = logging.getLogger(__name__)
+from brainscore_core.submission.database_models import Score, Model, BenchmarkType, BenchmarkInstance, Reference, \
+    User, clear_schema
 
 SAMPLE_BIBTEX = """@Article{Freeman2013,
-                                author={Freeman, Jeremy and Ziemba, Corey M. and Heeger, David J. 
-                                        and Simoncelli, Eero P. and Movshon, J. Anthony},
-                                title={A functional and perceptual signature of the second visual area in primates},
-                                journal={Nature Neuroscience},
-                                year={2013},
-                                month={Jul},
-                                day={01},
-                                volume={16},
-                                number={7},
-                                pages={974-981},
-                                issn={1546-1726},
-                                doi={10.1038/nn.3402},
-                                url={https://doi.org/10.1038/nn.3402}
-                                }"""
-
-
-class SchemaTest:
-    @classmethod
-    def setup_class(cls):
-        logger.info('Connect to database')
-        connect_db(db_secret='sqlite3.db')
-        clear_schema()
-
-    def setup_method(self):
-        logger.info('Initialize database entries')
-        init_users()
-
-    def teardown_method(self):
-        logger.info('Clean database')
-        clear_schema()
-
-
-class TestUser(SchemaTest):
+    author={Freeman, Jeremy and Ziemba, Corey M. and Heeger, David J.
+            and Simoncelli, Eero P. and Movshon, J. Anthony},
+    title={A functional and perceptual signature of the second visual area in primates},
+    journal={Nature Neuroscience},
+    year={2013},
+    month={Jul},
+    day={01},
+    volume={16},
+    number={7},
+    pages={974-981},
+    issn={1546-1726},
+    doi={10.1038/nn.3402},
+    url={https://doi.org/10.1038/nn.3402}
+}"""
+
+
+class TestUser:
     def test_email_from_uid(self):
         email = email_from_uid(1)
         assert email == 'test@brainscore.com'
@@ -64,7 +48,7 @@ def _mock_submission_entry(jenkins_id=123, user_id=1, model_type='base_model'):
     return submissionentry_from_meta(jenkins_id=jenkins_id, user_id=user_id, model_type=model_type)
 
 
-class TestModel(SchemaTest):
+class TestModel:
     def test_submission(self):
         entry = submissionentry_from_meta(jenkins_id=123, user_id=1, model_type='artificial_subject')
         assert entry.status == 'running'
@@ -91,6 +75,20 @@ class TestModel(SchemaTest):
         # even though resubmission had different submitter, model owner should still be original user
         assert original_entry.owner == resubmit_entry.owner
 
+    def test_duplicate_model_selects_lowest_id(self, caplog):
+        submission_entry = _mock_submission_entry()
+        # insert the higher id first so that insertion order and id order differ
+        Model.create(id=1001, name='dummy', domain='test', public=True, owner=2, submission=submission_entry)
+        Model.create(id=1000, name='dummy', domain='test', public=True, owner=1, submission=submission_entry)
+        with caplog.at_level(logging.DEBUG, logger='peewee'):
+            entry = modelentry_from_model(model_identifier='dummy', domain='test',
+                                          submission=submission_entry, public=True, competition=None)
+        assert entry.id == 1000
+        # SQLite happens to scan in rowid order, so also check that the order is enforced by the query itself
+        model_queries = [str(record.msg) for record in caplog.records
+                         if 'SELECT' in str(record.msg) and 'brainscore_model' in str(record.msg)]
+        assert model_queries and all('ORDER BY' in query for query in model_queries)
+
 
 class _MockBenchmark(BenchmarkBase):
     def __init__(self):
@@ -100,10 +98,16 @@ class _MockBenchmark(BenchmarkBase):
             identifier='dummy', ceiling=dummy_ceiling, version=0, parent='neural')
 
 
-class TestBenchmark(SchemaTest):
-    def test_benchmark_instance_no_parent(self):
-        benchmark = _MockBenchmark()
-        instance = benchmarkinstance_from_benchmark(benchmark, domain='test')
+_MOCK_BENCHMARK = _MockBenchmark()  # read-only, shared across tests
+
+
+class TestBenchmark:
+    @pytest.fixture
+    def mock_benchmark_instance(self, _txn):
+        return benchmarkinstance_from_benchmark(_MOCK_BENCHMARK, domain='test')
+
+    def test_benchmark_instance_no_parent(self, mock_benchmark_instance):
+        instance = mock_benchmark_instance
         type = BenchmarkType.get(identifier=instance.benchmark)
         assert instance.ceiling == 0.6
         assert instance.ceiling_error == 0.1
@@ -112,10 +116,15 @@ class TestBenchmark(SchemaTest):
     def test_benchmark_instance_existing_parent(self):
         # initially create the parent to see if the benchmark properly links to it
         BenchmarkType.create(identifier='neural', order=3, domain='test', owner_id=2)
-        benchmark = _MockBenchmark()
-        instance = benchmarkinstance_from_benchmark(benchmark, domain='test')
+        instance = benchmarkinstance_from_benchmark(_MOCK_BENCHMARK, domain='test')
         assert instance.benchmark.parent.identifier == 'neural'
 
+    def test_benchmark_instance_existing_fetches_type(self, mock_benchmark_instance):
+        instance = benchmarkinstance_from_benchmark(_MOCK_BENCHMARK, domain='test')  # retrieve existing instance
+        with count_queries() as counter:
+            assert instance.benchmark.identifier == 'dummy'
+        assert counter.count == 0
+
     def test_reference(self):
         ref = reference_from_bibtex(SAMPLE_BIBTEX)
         assert isinstance(ref, Reference)
@@ -126,50 +135,53 @@ class TestBenchmark(SchemaTest):
         assert ref2.id == ref.id
 
 
-def _create_score_entry():
-    submission_entry = submissionentry_from_meta(jenkins_id=123, user_id=1, model_type='brain_model')
-    model_entry = modelentry_from_model(model_identifier='dummy', domain='test',
-                                        submission=submission_entry, public=True, competition=None)
-    benchmark_entry = benchmarkinstance_from_benchmark(_MockBenchmark(), domain='test')
-    entry, created = Score.get_or_create(benchmark=benchmark_entry, model=model_entry)
-    return entry
-
-
-class TestScore(SchemaTest):
-    def test_score_no_ceiling(self):
+class TestScore:
+    @pytest.fixture(scope='class')
+    @classmethod
+    def model_benchmark_entries(cls, _class_txn):
+        """ create the model and benchmark rows once per class; only the score row is created per test """
+        submission_entry = submissionentry_from_meta(jenkins_id=123, user_id=1, model_type='brain_model')
+        model_entry = modelentry_from_model(model_identifier='dummy', domain='test',
+                                            submission=submission_entry, public=True, competition=None)
+        benchmark_entry = benchmarkinstance_from_benchmark(_MOCK_BENCHMARK, domain='test')
+        return model_entry, benchmark_entry
+
+    @pytest.fixture
+    def entry(self, _txn, model_benchmark_entries):
+        model_entry, benchmark_entry = model_benchmark_entries
+        entry, created = Score.get_or_create(benchmark=benchmark_entry, model=model_entry)
+        return entry
+
+    def test_score_no_ceiling(self, entry):
         score = ScoreObject([.123, np.nan], coords={'aggregation': ['center', 'error']}, dims=['aggregation'])
-        entry = _create_score_entry()
         update_score(score, entry)
         assert entry.score_ceiled is None
         assert np.isnan(entry.error)
         assert entry.score_raw == .123
 
-    def test_score_with_ceiling(self):
+    def test_score_with_ceiling(self, entry):
         score = ScoreObject([.42, .1], coords={'aggregation': ['center', 'error']}, dims=['aggregation'])
         score.attrs['raw'] = ScoreObject([.336, .08], coords={'aggregation': ['center', 'error']}, dims=['aggregation'])
         score.attrs['ceiling'] = ScoreObject(.8)
-        entry = _create_score_entry()
         update_score(score, entry)
         assert entry.score_ceiled == .42
         assert entry.error == .1
         assert entry.score_raw == .336
 
-    def test_score_no_aggregation(self):
+    def test_score_no_aggregation(self, entry):
         score = ScoreObject(.42)
-        entry = _create_score_entry()
         update_score(score, entry)
         assert entry.score_raw == .42
         assert entry.error is None
 
-    def test_score_error_attr(self):
+    def test_score_error_attr(self, entry):
         score = ScoreObject(.42)
         score.attrs['error'] = .1
-        entry = _create_score_entry()
         update_score(score, entry)
         assert entry.error == .1
 
 
-class TestPublic(SchemaTest):
+class TestPublic:
     def test_one_public_model(self):
         # create model
         submission_entry = _mock_submission_entry()
@@ -213,44 +225,48 @@ class TestPublic(SchemaTest):
 
     def test_one_public_one_private_benchmark(self):
         # create benchmarktypes and benchmarkinstances
-        BenchmarkType.create(identifier='dummy_public', domain='test', visible=True, order=1, owner_id=2)
-        BenchmarkInstance.create(benchmark='dummy_public')
-
-        BenchmarkType.create(identifier='dummy_private', domain='test', visible=False, order=1, owner_id=2)
-        BenchmarkInstance.create(benchmark='dummy_private')
+        BenchmarkType.bulk_create([
+            BenchmarkType(identifier='dummy_public', domain='test', visible=True, order=1, owner_id=2),
+            BenchmarkType(identifier='dummy_private', domain='test', visible=False, order=1, owner_id=2)])
+        BenchmarkInstance.bulk_create([BenchmarkInstance(benchmark='dummy_public'),
+                                       BenchmarkInstance(benchmark='dummy_private')])
         # test
         public_benchmarks = public_benchmark_identifiers(domain='test')
         assert public_benchmarks == ["dummy_public"]
 
     def test_two_public_two_private_benchmarks(self):
         # create benchmarktypes and benchmarkinstances
-        BenchmarkType.create(identifier='dummy_public1', domain='test', visible=True, order=1, owner_id=2)
-        BenchmarkInstance.create(benchmark='dummy_public1')
-
-        BenchmarkType.create(identifier='dummy_public2', domain='test', visible=True, order=1, owner_id=2)
-        BenchmarkInstance.create(benchmark='dummy_public2')
-
-        BenchmarkType.create(identifier='dummy_private1', domain='test', visible=False, order=1, owner_id=2)
-        BenchmarkInstance.create(benchmark='dummy_private1')
-
-        BenchmarkType.create(identifier='dummy_private2', domain='test', visible=False, order=1, owner_id=2)
-        BenchmarkInstance.create(benchmark='dummy_private2')
+        BenchmarkType.bulk_create([
+            BenchmarkType(identifier='dummy_public1', domain='test', visible=True, order=1, owner_id=2),
+            BenchmarkType(identifier='dummy_public2', domain='test', visible=True, order=1, owner_id=2),
+            BenchmarkType(identifier='dummy_private1', domain='test', visible=False, order=1, owner_id=2),
+            BenchmarkType(identifier='dummy_private2', domain='test', visible=False, order=1, owner_id=2)])
+        BenchmarkInstance.bulk_create([BenchmarkInstance(benchmark=identifier) for identifier in
+                                       ['dummy_public1', 'dummy_public2', 'dummy_private1', 'dummy_private2']])
         # test
         public_benchmarks = public_benchmark_identifiers(domain='test')
         assert set(public_benchmarks) == {"dummy_public1", "dummy_public2"}
 
     def test_with_parent_benchmark(self):
         # create benchmarktypes and benchmarkinstances
-        BenchmarkType.create(identifier='dummy_parent', domain='test', visible=True, order=1, owner_id=2)
-
-        BenchmarkType.create(identifier='dummy_child1', parent="dummy_parent",
-                             domain='test', visible=True, order=1, owner_id=2)
-        BenchmarkInstance.create(benchmark='dummy_child1')
-
-        BenchmarkType.create(identifier='dummy_child2', parent="dummy_parent",
-                             domain='test', visible=True, order=1, owner_id=2)
-        BenchmarkInstance.create(benchmark='dummy_child2')
+        BenchmarkType.bulk_create([
+            BenchmarkType(identifier='dummy_parent', domain='test', visible=True, order=1, owner_id=2),
+            BenchmarkType(identifier='dummy_child1', parent="dummy_parent",
+                          domain='test', visible=True, order=1, owner_id=2),
+            BenchmarkType(identifier='dummy_child2', parent="dummy_parent",
+                          domain='test', visible=True, order=1, owner_id=2)])
+        BenchmarkInstance.bulk_create([BenchmarkInstance(benchmark='dummy_child1'),
+                                       BenchmarkInstance(benchmark='dummy_child2')])
 
         # test
         public_benchmarks = public_benchmark_identifiers(domain='test')
         assert public_benchmarks == ["dummy_child1", "dummy_child2"]
+
+
+@pytest.mark.integration
+class TestClearSchema:
+    def test_clear_schema(self):
+        BenchmarkType.create(identifier='dummy', domain='test', visible=True, order=1, owner_id=2)
+        clear_schema()
+        assert BenchmarkType.select().count() == 0
+        assert User.select().count() == 0
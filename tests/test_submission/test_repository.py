@@ -1,55 +1,51 @@
-import logging
 import os
-import tempfile
-from pathlib import Path
 
 import pytest
 
-from brainscore_core.submission.database import connect_db
-from brainscore_core.submission.database_models import clear_schema
 from brainscore_core.submission.repository import extract_zip_file, find_submission_directory
-from tests.test_submission import init_users
 
-logger = logging.getLogger(__name__)
+
+@pytest.fixture(scope='session')
+def extracted_candidate_models(tmp_path_factory):
+    """ unpack the sample submission once per session; returns the working directory and the submission directory """
+    work_dir = str(tmp_path_factory.mktemp('submission_33'))
+    path = extract_zip_file(33, TestRepository.config_dir, work_dir)
+    return work_dir, path
 
 
 @pytest.mark.memory_intense
 class TestRepository:
-    working_dir = None
     config_dir = str(os.path.join(os.path.dirname(__file__), 'configs/'))
 
-    @classmethod
-    def setup_class(cls):
-        connect_db(db_secret='sqlite3.db')
-        clear_schema()
-        init_users()
-
-    @classmethod
-    def tear_down_class(cls):
-        clear_schema()
-
-    def setup_method(self):
-        tmpdir = tempfile.mkdtemp()
-        TestRepository.working_dir = tmpdir
-
-    def tear_down_method(self):
-        os.rmdir(TestRepository.working_dir)
-
-    def test_extract_zip_file(self):
-        path = extract_zip_file(33, TestRepository.config_dir, TestRepository.working_dir)
-        assert str(path) == f'{TestRepository.working_dir}/candidate_models'
-
-    def test_find_correct_dir(self):
-        Path(f'{TestRepository.working_dir}/.temp').touch()
-        Path(f'{TestRepository.working_dir}/_MACOS').touch()
-        Path(f'{TestRepository.working_dir}/candidate_models').touch()
-        dir = find_submission_directory(TestRepository.working_dir)
-        assert dir == 'candidate_models'
-
-    def test_too_many_dirs(self):
-        Path(f'{TestRepository.working_dir}/.temp').touch()
-        Path(f'{TestRepository.working_dir}/_MACOS').touch()
-        Path(f'{TestRepository.working_dir}/candidate_models').touch()
-        Path(f'{TestRepository.working_dir}/candidate_models2').touch()
+    @pytest.fixture
+    def working_dir(self, tmp_path):
+        return str(tmp_path)
+
+    def test_extract_zip_file(self, extracted_candidate_models):
+        work_dir, path = extracted_candidate_models
+        assert str(path) == f'{work_dir}/candidate_models'
+        assert path.is_dir()
+
+    @pytest.mark.parametrize('files, expected', [
+        (['.temp', '_MACOS', 'candidate_models'], 'candidate_models'),
+        (['.temp', 'candidate_models', 'sample-model-submission'], 'sample-model-submission'),
+    ])
+    def test_find_correct_dir(self, working_dir, files, expected):
+        _create_files(working_dir, files)
+        dir = find_submission_directory(working_dir)
+        assert dir == expected
+
+    def test_too_many_dirs(self, working_dir):
+        _create_files(working_dir, ['.temp', '_MACOS', 'candidate_models', 'candidate_models2'])
         with pytest.raises(Exception):
-            find_submission_directory(TestRepository.working_dir)
+            find_submission_directory(working_dir)
+
+
+def _create_files(directory, names):
+    for name in names:
+        _touch_fast(os.path.join(directory, name))
+
+
+def _touch_fast(path):
+    """ create an empty file with a bare `open`/`close` pair, without a Python file object or a timestamp update """
+    os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o644))